@@ -0,0 +1,93 @@
+"""
+Fixed-column layout of PDB coordinate records, shared by the utilities
+in this directory so the column "magic numbers" live in one place.
+
+Slices follow the PDB v3.3 spec (0-based Python indices): columns 7-11
+hold the atom serial, 18-20 the residue name, 22 the chain ID and 23-26
+the residue sequence number.
+"""
+
+SERIAL = slice(6, 11)
+RES_NAME = slice(17, 20)
+CHAIN_ID = slice(21, 22)
+RES_SEQ = slice(22, 26)
+
+# Per-byte digit values for parsing fixed-width numeric fields: '0'-'9'
+# map to 0-9 and ' ' maps to 0 (right-justified padding contributes
+# nothing); every other byte maps to a sentinel so negative that a
+# single bad lane forces the weighted sum below zero.
+_DIGIT = [-10000] * 256
+_DIGIT[0x20] = 0
+for _d in range(10):
+    _DIGIT[0x30 + _d] = _d
+_DIGIT = tuple(_DIGIT)
+
+
+def parse_res_seq(field):
+    """
+    Parse the 4-byte resSeq field into an int with four table lookups
+    and a weighted sum -- no intermediate stripped string and no general
+    int() parser. Returns None for anything that is not a right-
+    justified unsigned number (insertion codes, signs, empty fields,
+    spaces at or after a digit), matching what the vectorized path
+    accepts; callers fall back to their general handling for those.
+
+    Args:
+        field (bytes): The 4-byte resSeq column (line[RES_SEQ]).
+
+    Returns:
+        int or None: The parsed residue number, or None if malformed.
+    """
+    if len(field) != 4:
+        # Truncated line: the slice came up short
+        return None
+    value = (_DIGIT[field[0]] * 1000 + _DIGIT[field[1]] * 100
+             + _DIGIT[field[2]] * 10 + _DIGIT[field[3]])
+    if value < 0:
+        return None
+    # Spaces may only pad on the left; a space at or after a digit (or
+    # an all-space field) is not a right-justified number
+    if (field[3] == 0x20
+            or (field[1] == 0x20 and field[0] != 0x20)
+            or (field[2] == 0x20 and field[1] != 0x20)):
+        return None
+    return value
+
+
+def res_seq_parseable(field):
+    """
+    True if the resSeq field is numeric under int()'s rules: optional
+    surrounding spaces and an optional sign before the digits. This is
+    the single acceptance grammar shared by every implementation, so
+    which fields get renumbered or trimmed never depends on whether the
+    compiled or vectorized path happens to be available.
+
+    Args:
+        field (bytes): The 4-byte resSeq column (line[RES_SEQ]).
+
+    Returns:
+        bool: Whether int(field) would succeed.
+    """
+    stripped = field.strip()
+    return (stripped.isdigit()
+            or (stripped[:1] in (b'+', b'-') and stripped[1:].isdigit()))
+
+
+def format_ter(last_line):
+    """
+    Synthesize a TER record from the last written ATOM/HETATM line,
+    reusing its serial, residue name, chain ID and residue number.
+    %-formatting on bytes avoids an f-string plus encode round trip.
+
+    Args:
+        last_line (bytes): The ATOM/HETATM record to derive the TER from.
+
+    Returns:
+        bytes: A newline-terminated TER record.
+    """
+    return b"TER   %4d      %s %s%s\n" % (
+        int(last_line[SERIAL]),
+        last_line[RES_NAME],
+        last_line[CHAIN_ID],
+        last_line[RES_SEQ],
+    )
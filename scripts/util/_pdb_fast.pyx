@@ -0,0 +1,177 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Optional compiled fast path for the PDB utilities in this directory.
+
+Build it in place with:
+
+    cythonize -i scripts/util/_pdb_fast.pyx
+
+The pure-Python implementations in add_offsite.py / pdb_trimmer.py are
+used automatically whenever this extension has not been built, so the
+scripts work unchanged without Cython installed.
+"""
+
+from libc.stdint cimport uint32_t
+from libc.string cimport memchr, memcmp, memcpy
+from libc.stdio cimport snprintf
+
+
+cdef inline bint _swar_parse_4(const char* p, int* val):
+    """
+    Branchless SWAR parse of the right-justified 4-char resSeq field.
+
+    Loads the field as a single little-endian uint32, rewrites leading
+    space lanes to ASCII '0', validates that all four lanes are then
+    digits with one packed range check, and finishes with an unrolled
+    multiply-add. Handles the common case only (spaces then digits, no
+    sign); anything else returns False so the caller can take the
+    general path.
+    """
+    cdef uint32_t w, x, sp
+    memcpy(&w, p, 4)
+
+    # Lanes equal to 0x20 (space) get their 0x10 bit set, becoming '0'.
+    # The zero-lane detector is the borrow-free variant so lanes above a
+    # space are never falsely flagged.
+    x = w ^ 0x20202020U
+    sp = ~(((x & 0x7F7F7F7FU) + 0x7F7F7F7FU) | x | 0x7F7F7F7FU)
+    # Spaces are only valid as a contiguous prefix of the field (low
+    # bytes on a little-endian load), and an all-space field is empty
+    if sp == 0x80808080U or ((sp >> 8) & ~sp & 0x00808080U) != 0:
+        return False
+    w |= sp >> 3
+
+    # All four lanes must now be '0'..'9'
+    if (((w - 0x30303030U) | (0x39393939U - w)) & 0x80808080U) != 0:
+        return False
+
+    x = w - 0x30303030U
+    val[0] = ((x & 0xFF) * 1000
+              + ((x >> 8) & 0xFF) * 100
+              + ((x >> 16) & 0xFF) * 10
+              + ((x >> 24) & 0xFF))
+    return True
+
+
+cdef inline void _swar_format_4(int v, char* p):
+    """
+    Format 0 <= v <= 9999 as a right-justified 4-char decimal field.
+
+    Packs the four BCD digits into a uint32, ORs in ASCII '0', then
+    blanks the leading-zero lanes (never the ones lane) back to spaces
+    -- all without a branch or a libc call.
+    """
+    cdef uint32_t w, x, m, pz
+    w = (<uint32_t>(v / 1000)
+         | (<uint32_t>(v / 100 % 10) << 8)
+         | (<uint32_t>(v / 10 % 10) << 16)
+         | (<uint32_t>(v % 10) << 24))
+    w |= 0x30303030U
+
+    # Detect '0' lanes (borrow-free variant), keep only the contiguous
+    # run starting at the thousands lane, and flip those from '0'
+    # (0x30) to ' ' (0x20); the ones lane is masked out up front
+    x = w ^ 0x30303030U
+    m = ~(((x & 0x7F7F7F7FU) + 0x7F7F7F7FU) | x | 0x7F7F7F7FU) & 0x00808080U
+    pz = m & 0x80U
+    pz |= m & (pz << 8)
+    pz |= m & (pz << 8)
+    w ^= pz >> 3
+
+    memcpy(p, &w, 4)
+
+
+cdef inline bint _parse_resi(const char* p, int* val):
+    """
+    Parse the fixed-width 4-char resSeq field at p into *val.
+
+    Accepts leading/trailing spaces and an optional sign, matching what
+    int() accepts for the space-padded bytes field. Returns False for
+    anything else (e.g. insertion codes), in which case the caller
+    passes the line through verbatim.
+    """
+    cdef int i = 0
+    cdef int sign = 1
+    cdef int v = 0
+    cdef bint seen_digit = False
+
+    while i < 4 and p[i] == c' ':
+        i += 1
+    if i < 4 and (p[i] == c'-' or p[i] == c'+'):
+        if p[i] == c'-':
+            sign = -1
+        i += 1
+    while i < 4 and c'0' <= p[i] <= c'9':
+        v = v * 10 + (p[i] - c'0')
+        seen_digit = True
+        i += 1
+    while i < 4:
+        if p[i] != c' ':
+            return False
+        i += 1
+    if not seen_digit:
+        return False
+    val[0] = sign * v
+    return True
+
+
+cpdef tuple renumber(bytes data, int offset, bytearray out):
+    """
+    Renumber the resSeq field of every ATOM/HETATM record in data.
+
+    Walks lines with memchr, does a fixed-column parse of columns 22:26,
+    and writes the result into the preallocated bytearray out. Returns
+    (bytes_written, overflow_resi): the caller truncates out to the
+    first value, and a non-zero second value is the first renumbered
+    residue that could not be rendered in 4 characters (0 always fits,
+    so 0 means none overflowed) for the caller's warn-once diagnostic.
+    The patched field is always exactly 4 bytes (overflowing numbers
+    become '****', the PDB overflow convention), so len(data) is a
+    sufficient size for out.
+    """
+    cdef const char* buf = data
+    cdef char* ob = out
+    cdef Py_ssize_t n = len(data)
+    cdef Py_ssize_t pos = 0
+    cdef Py_ssize_t oi = 0
+    cdef Py_ssize_t end, line_len
+    cdef const char* nl
+    cdef int resi, m
+    cdef int overflow_resi = 0
+    cdef char tmp[16]
+
+    while pos < n:
+        nl = <const char*>memchr(buf + pos, c'\n', n - pos)
+        if nl == NULL:
+            end = n
+        else:
+            end = (nl - buf) + 1
+        line_len = end - pos
+
+        if (line_len >= 26
+                and (memcmp(buf + pos, b"ATOM  ", 6) == 0
+                     or memcmp(buf + pos, b"HETATM", 6) == 0)
+                and (_swar_parse_4(buf + pos + 22, &resi)
+                     or _parse_resi(buf + pos + 22, &resi))):
+            memcpy(ob + oi, buf + pos, 22)
+            oi += 22
+            if 0 <= resi + offset <= 9999:
+                # Common case: SWAR formatter, no libc call
+                _swar_format_4(resi + offset, ob + oi)
+            elif -999 <= resi + offset < 0:
+                snprintf(tmp, sizeof(tmp), "%4d", resi + offset)
+                memcpy(ob + oi, tmp, 4)
+            else:
+                # Does not fit the 4-char field: PDB overflow convention
+                if overflow_resi == 0:
+                    overflow_resi = resi + offset
+                memcpy(ob + oi, b"****", 4)
+            oi += 4
+            memcpy(ob + oi, buf + pos + 26, line_len - 26)
+            oi += line_len - 26
+        else:
+            memcpy(ob + oi, buf + pos, line_len)
+            oi += line_len
+        pos = end
+
+    return oi, overflow_resi
@@ -0,0 +1,126 @@
+"""
+Structure-of-arrays (SoA) view of a PDB file for vectorized processing.
+
+Instead of treating a PDB as a sequence of text lines (an
+array-of-structures), the helpers here turn it into fixed-size columnar
+arrays: one entry per line for the record type, chain ID and parsed
+residue number, plus line offsets into the raw byte buffer. Renumbering
+and trimming decisions then become plain NumPy ufunc expressions, which
+is both cache-friendly and free of per-line Python overhead.
+"""
+
+import numpy as np
+
+from _pdb_cols import RES_SEQ, CHAIN_ID
+
+# record_type codes
+REC_OTHER = 0
+REC_ATOM = 1
+REC_HETATM = 2
+
+_ATOM = np.frombuffer(b'ATOM  ', dtype=np.uint8)
+_HETATM = np.frombuffer(b'HETATM', dtype=np.uint8)
+
+# Place values of the 4-char right-justified resSeq field
+_RES_SEQ_WEIGHTS = np.array([1000, 100, 10, 1])
+
+
+def line_bounds(buf):
+    """
+    Locate lines in a uint8 file buffer.
+
+    Returns (line_start, line_end) int64 arrays; line_end points one
+    past the trailing newline (or the buffer end for the last line).
+    """
+    size = buf.shape[0]
+    newlines = np.flatnonzero(buf == 0x0A)
+    starts = np.empty(len(newlines) + 1, dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = newlines + 1
+    if len(starts) > 1 and starts[-1] >= size:
+        starts = starts[:-1]
+    ends = np.empty(len(starts), dtype=np.int64)
+    ends[:-1] = starts[1:]
+    ends[-1] = size
+    return starts, ends
+
+
+def pdb_to_soa(path):
+    """
+    Parse a PDB file into a columnar dict with one entry per line:
+
+        buf         uint8[size]  raw file bytes
+        line_start  int64[N]     offset of each line
+        line_end    int64[N]     offset one past each line (incl. newline)
+        record_type uint8[N]     REC_ATOM / REC_HETATM / REC_OTHER
+        chain_id    uint8[N]     chain-column byte (0 for short lines)
+        res_seq     int32[N]     parsed resSeq, valid where res_seq_ok
+        res_seq_ok  bool[N]      resSeq column is a well-formed number
+
+    Args:
+        path (str): Path to the PDB file.
+
+    Returns:
+        dict: The SoA representation described above.
+    """
+    return buf_to_soa(np.fromfile(path, dtype=np.uint8))
+
+
+def buf_to_soa(buf):
+    """
+    Build the SoA dict (see pdb_to_soa) from an in-memory uint8 buffer.
+    """
+    size = buf.shape[0]
+    if size == 0:
+        return {
+            'buf': buf,
+            'line_start': np.zeros(0, dtype=np.int64),
+            'line_end': np.zeros(0, dtype=np.int64),
+            'record_type': np.zeros(0, dtype=np.uint8),
+            'chain_id': np.zeros(0, dtype=np.uint8),
+            'res_seq': np.zeros(0, dtype=np.int32),
+            'res_seq_ok': np.zeros(0, dtype=bool),
+        }
+
+    starts, ends = line_bounds(buf)
+    n = len(starts)
+    content_len = (ends - starts) - (buf[ends - 1] == 0x0A)
+
+    record_type = np.zeros(n, dtype=np.uint8)
+    chain_id = np.zeros(n, dtype=np.uint8)
+    res_seq = np.zeros(n, dtype=np.int32)
+    res_seq_ok = np.zeros(n, dtype=bool)
+
+    # Only lines long enough to hold the resSeq column are candidates
+    idx = np.flatnonzero(content_len >= RES_SEQ.stop)
+    if len(idx):
+        s = starts[idx]
+
+        rec = buf[s[:, None] + np.arange(6)]
+        record_type[idx[(rec == _ATOM).all(axis=1)]] = REC_ATOM
+        record_type[idx[(rec == _HETATM).all(axis=1)]] = REC_HETATM
+
+        chain_id[idx] = buf[s + CHAIN_ID.start]
+
+        # Parse the 4-char resSeq field; leading spaces contribute 0,
+        # which is correct for a right-justified number. Fields that are
+        # not spaces-then-digits (insertion codes, signs, empty) are
+        # flagged invalid and left to the caller.
+        fld = buf[s[:, None] + np.arange(RES_SEQ.start, RES_SEQ.stop)]
+        is_digit = (fld >= 0x30) & (fld <= 0x39)
+        is_space = fld == 0x20
+        valid = ((is_digit | is_space).all(axis=1)
+                 & is_digit.any(axis=1)
+                 & ~(is_space & np.maximum.accumulate(is_digit, axis=1)).any(axis=1))
+        res_seq[idx] = ((fld - 0x30) * is_digit) @ _RES_SEQ_WEIGHTS
+        res_seq_ok[idx] = valid
+
+    return {
+        'buf': buf,
+        'line_start': starts,
+        'line_end': ends,
+        'record_type': record_type,
+        'chain_id': chain_id,
+        'res_seq': res_seq,
+        'res_seq_ok': res_seq_ok,
+    }
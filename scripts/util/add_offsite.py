@@ -1,103 +1,268 @@
 import sys
 import argparse
 import os
+import mmap
+import logging
+
+from _pdb_cols import RES_SEQ, parse_res_seq, res_seq_parseable
+
+log = logging.getLogger(__name__)
+
+# Record-name constants, pre-allocated so the hot loop never builds them
+ATOM_RECORDS = (b'ATOM  ', b'HETATM')
+
+# Compiled fast path (see _pdb_fast.pyx); None when the extension has
+# not been built, in which case the vectorized or pure-Python loop
+# below is used
+try:
+    from _pdb_fast import renumber as _renumber_fast
+except ImportError:
+    _renumber_fast = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    from _pdb_soa import buf_to_soa, REC_OTHER
 
 def renumber_pdb_residues(input_filename, output_filename, offset):
     """
     Renames the residue sequence numbers (resSeq) in a PDB file by adding a specified offset.
     Only processes ATOM and HETATM records.
 
+    The input is memory-mapped and processed as raw bytes: lines are located
+    with mm.find(b'\\n') so no per-line str objects are decoded, and the
+    renumbered content is accumulated in a single bytearray that is written
+    out in one call. This keeps large PDBs I/O-bound instead of
+    interpreter-bound.
+
     Args:
         input_filename (str): Path to the original PDB file.
         output_filename (str): Path to the output PDB file.
         offset (int): The number to add to the existing resSeq of every residue.
     """
-    
-    # PDB format uses fixed columns:
-    # resSeq is in columns 23-26 (Python slice indices 22:26)
-    RESIDUE_NUMBER_START = 22
-    RESIDUE_NUMBER_END = 26
-    
-    # Store the renumbered lines
-    modified_lines = []
-    
+
     try:
-        with open(input_filename, 'r') as infile:
-            print(f"Reading input file: {input_filename}")
-            for line in infile:
-                # Check if the record is an ATOM or HETATM, which contain coordinates
-                record_name = line[0:6].strip()
-                
-                if record_name in ('ATOM', 'HETATM'):
-                    # 1. Extract the current residue number string
-                    try:
-                        current_resi_str = line[RESIDUE_NUMBER_START:RESIDUE_NUMBER_END].strip()
-                        current_resi = int(current_resi_str)
-                    except ValueError:
-                        # Handle lines where resSeq might be non-numeric or missing
-                        modified_lines.append(line)
-                        continue
-                        
-                    # 2. Calculate the new residue number
-                    new_resi = current_resi + offset
-                    
-                    # 3. Format the new number back into a 4-character string
-                    # It must be right-justified and padded with spaces to maintain PDB format
-                    new_resi_str = f"{new_resi:4d}"
-                    
-                    if len(new_resi_str) > 4:
-                        print(f"Warning: Residue number {new_resi} exceeds 4 digits (max 9999). Residue will be truncated in the output.")
-
-                    # 4. Construct the new line by splicing the string
-                    new_line = (
-                        line[:RESIDUE_NUMBER_START] + 
-                        new_resi_str + 
-                        line[RESIDUE_NUMBER_END:]
-                    )
-                    modified_lines.append(new_line)
+        fd = os.open(input_filename, os.O_RDONLY)
+        try:
+            log.info("Reading input file: %s", input_filename)
+            size = os.fstat(fd).st_size
+
+            if size == 0:
+                # mmap cannot map an empty file; just produce an empty output
+                with open(output_filename, 'wb') as outfile:
+                    pass
+                log.info("Successfully renumbered residues.")
+                log.info("Offset applied: +%d", offset)
+                log.info("Output saved to: %s", output_filename)
+                return
+
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                if _renumber_fast is not None:
+                    # Patched fields keep their 4-byte width, so the
+                    # output is exactly the input size
+                    out = bytearray(size)
+                    n_out, overflow_resi = _renumber_fast(mm[:], offset, out)
+                    del out[n_out:]
+                    if overflow_resi:
+                        _warn_overflow(overflow_resi)
                 else:
-                    # Keep non-coordinate lines (HEADER, REMARK, TER, END, etc.) as is
-                    modified_lines.append(line)
+                    out = None
+                    if np is not None:
+                        out = _renumber_numpy(mm, size, offset)
+                    if out is None:
+                        out = _renumber_python(mm, size, offset)
+        finally:
+            os.close(fd)
 
-        # Write the modified content to the output file
-        with open(output_filename, 'w') as outfile:
-            outfile.writelines(modified_lines)
-            
-        print(f"\nSuccessfully renumbered residues.")
-        print(f"Offset applied: +{offset}")
-        print(f"Output saved to: {output_filename}")
+        # Write the modified content to the output file in a single call
+        with open(output_filename, 'wb') as outfile:
+            outfile.write(out)
+
+        log.info("Successfully renumbered residues.")
+        log.info("Offset applied: +%d", offset)
+        log.info("Output saved to: %s", output_filename)
 
     except FileNotFoundError:
-        print(f"Error: Input file '{input_filename}' not found.")
+        log.error("Input file '%s' not found.", input_filename)
         sys.exit(1) # Exit with an error code
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        log.error("An unexpected error occurred: %s", e)
         sys.exit(1)
 
+def _renumber_numpy(mm, size, offset):
+    """
+    Vectorized renumbering over the memory-mapped input.
+
+    Builds the structure-of-arrays view from _pdb_soa and patches the
+    resSeq column of every ATOM/HETATM record with NumPy ufuncs -- no
+    per-line Python loop. Because the field is patched in place, this
+    path only handles new residue numbers that still fit the 4-char
+    column (0..9999); it returns None to defer to _renumber_python
+    whenever a line would change length (overflow or negative result)
+    so the splice-based loop can handle it, and likewise whenever a
+    coordinate line falls outside the strict right-justified form but
+    still parses under the shared grammar. Fields no path accepts are
+    passed through untouched.
+    """
+    buf = np.frombuffer(mm, dtype=np.uint8).copy()
+    soa = buf_to_soa(buf)
+
+    # Coordinate lines the strict SoA parser rejects may still satisfy
+    # the shared int() grammar (signed or non-right-justified numbers);
+    # those must be renumbered, so defer to the scalar loop whenever one
+    # exists. Such lines are rare, so the per-line check stays off the
+    # common path.
+    suspect = (soa['record_type'] != REC_OTHER) & ~soa['res_seq_ok']
+    if suspect.any():
+        for s in soa['line_start'][np.flatnonzero(suspect)]:
+            field = buf[s + RES_SEQ.start:s + RES_SEQ.stop].tobytes()
+            if res_seq_parseable(field):
+                return None
+
+    coord = (soa['record_type'] != REC_OTHER) & soa['res_seq_ok']
+    cand = soa['line_start'][coord]
+    if len(cand) == 0:
+        return buf.tobytes()
+
+    new_resi = soa['res_seq'][coord].astype(np.int64) + offset
+
+    if (new_resi < 0).any() or (new_resi > 9999).any():
+        # A patched field would change the line length; let the
+        # splice-based Python loop deal with it (and emit its warnings)
+        return None
+
+    # Format back to right-justified ASCII: leading zeros become spaces
+    chars = np.empty((len(new_resi), 4), dtype=np.uint8)
+    chars[:, 0] = np.where(new_resi >= 1000, 0x30 + new_resi // 1000, 0x20)
+    chars[:, 1] = np.where(new_resi >= 100, 0x30 + new_resi // 100 % 10, 0x20)
+    chars[:, 2] = np.where(new_resi >= 10, 0x30 + new_resi // 10 % 10, 0x20)
+    chars[:, 3] = 0x30 + new_resi % 10
+    buf[cand[:, None] + np.arange(RES_SEQ.start, RES_SEQ.stop)] = chars
+
+    return buf.tobytes()
+
+# Overflow is warned about once per process, not once per atom: a file
+# that overflows typically does so for thousands of records in a row
+_warned_overflow = False
+
+def _warn_overflow(new_resi):
+    global _warned_overflow
+    if not _warned_overflow and log.isEnabledFor(logging.WARNING):
+        log.warning(
+            "Residue number %d does not fit the 4-character resSeq field "
+            "(-999..9999); overflowing fields are written as '****'.",
+            new_resi
+        )
+        _warned_overflow = True
+
+def _renumber_python(mm, size, offset):
+    """
+    Pure-Python renumbering loop over the memory-mapped input.
+    Returns the renumbered file content as a bytearray.
+
+    The whole file is copied into a bytearray once and the 4-byte resSeq
+    field of each ATOM/HETATM record is patched in place; the
+    replacement is always exactly 4 bytes, so there is no per-line
+    splicing, no string concatenation and no separate output buffer.
+    Numbers that cannot be rendered in 4 characters are written as
+    '****' (with a warning), the PDB convention for overflowing fields.
+    """
+    buf = bytearray(mm)
+
+    # The offset is constant for the whole run, so the bounds of the
+    # parsed values that still render in 4 characters (-999..9999 after
+    # adding the offset) can be hoisted out of the loop; the hot path
+    # then never formats a number just to measure its length.
+    max_safe = 9999 - offset
+    min_safe = -999 - offset
+
+    pos = 0
+    while pos < size:
+        nl = buf.find(b'\n', pos)
+        end = size if nl == -1 else nl + 1
+        content_end = size if nl == -1 else nl
+
+        # Check if the record is an ATOM or HETATM, which contain
+        # coordinates, and that the line content (terminator excluded,
+        # as in buf_to_soa) holds the whole resSeq column -- otherwise
+        # the field slice would take in the newline or the next line's
+        # bytes and the patch would corrupt them
+        if content_end - pos >= RES_SEQ.stop and buf[pos:pos + 6] in ATOM_RECORDS:
+            # 1. Extract the current residue number via the lookup-table
+            # parser; the rare forms it rejects but int() still accepts
+            # (signed numbers, trailing spaces) go through the shared
+            # grammar check, matching the compiled path's _parse_resi.
+            # Non-numeric or missing fields are left untouched.
+            field = buf[pos + RES_SEQ.start:pos + RES_SEQ.stop]
+            current_resi = parse_res_seq(field)
+            if current_resi is None:
+                if not res_seq_parseable(field):
+                    pos = end
+                    continue
+                current_resi = int(field)
+
+            # 2. Format the offset number back into the 4-character
+            # field, right-justified and space-padded to maintain the
+            # PDB format, and patch it in place
+            if min_safe <= current_resi <= max_safe:
+                buf[pos + RES_SEQ.start:pos + RES_SEQ.stop] = b"%4d" % (current_resi + offset)
+            else:
+                _warn_overflow(current_resi + offset)
+                buf[pos + RES_SEQ.start:pos + RES_SEQ.stop] = b'****'
+        pos = end
+
+    return buf
+
 def main():
     """
     Main function to parse command-line arguments and run the renumbering.
     """
+    # Status messages go through logging so that importing callers (e.g.
+    # batch pipelines) can silence them; the CLI keeps them visible
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     parser = argparse.ArgumentParser(
         description="Renumber residues in a PDB file by adding a constant offset."
     )
     parser.add_argument(
         "input_pdb",
+        nargs="?",
         help="Path to the input PDB file (e.g., structure.pdb)"
     )
     parser.add_argument(
         "output_pdb",
+        nargs="?",
         help="Path for the renumbered output PDB file (e.g., renumbered.pdb)"
     )
     parser.add_argument(
         "offset",
+        nargs="?",
         type=int,
         help="The integer value to add to every residue number (e.g., 250)"
     )
+    parser.add_argument(
+        "--jobs",
+        help="TSV file with one 'input_pdb<TAB>output_pdb<TAB>offset' job per line, processed in parallel instead of the positional arguments"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes for --jobs (default: all cores)"
+    )
 
     args = parser.parse_args()
-    
-    renumber_pdb_residues(args.input_pdb, args.output_pdb, args.offset)
+
+    if args.jobs:
+        from batch import read_jobs, renumber_many
+        renumber_many(read_jobs(args.jobs), args.workers)
+    else:
+        if args.input_pdb is None or args.output_pdb is None or args.offset is None:
+            parser.error("input_pdb, output_pdb and offset are required unless --jobs is given")
+        renumber_pdb_residues(args.input_pdb, args.output_pdb, args.offset)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,69 @@
+"""
+Batch drivers for the PDB utilities in this directory.
+
+Real pipelines run renumbering/trimming over thousands of decoys; doing
+that one CLI invocation at a time wastes cores. The helpers here fan a
+job list out over a process pool -- the work is embarrassingly parallel
+at file level -- without changing the on-disk output format. Both
+add_offsite.py and pdb_trimmer.py expose this via a --jobs TSV flag.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from add_offsite import renumber_pdb_residues
+from pdb_trimmer import trim_pdb_by_residue_range
+
+
+def read_jobs(path):
+    """
+    Read a tab-separated job file, one job per line, skipping blank
+    lines and lines starting with '#'. Returns a list of column tuples.
+    """
+    jobs = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            jobs.append(tuple(line.split('\t')))
+    return jobs
+
+
+def _run_all(fn, jobs, workers):
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, *job) for job in jobs]
+        # Surface the first worker failure instead of dropping it
+        for future in futures:
+            future.result()
+
+
+def renumber_many(jobs, workers=None):
+    """
+    Renumber a batch of PDB files in parallel.
+
+    Args:
+        jobs (list): (input_pdb, output_pdb, offset) tuples.
+        workers (int, optional): Pool size; defaults to os.cpu_count().
+    """
+    _run_all(renumber_pdb_residues,
+             [(i, o, int(off)) for i, o, off in jobs],
+             workers)
+
+
+def trim_many(jobs, workers=None):
+    """
+    Trim a batch of PDB files in parallel.
+
+    Args:
+        jobs (list): (input_pdb, output_pdb, start_res, end_res) or
+            (input_pdb, output_pdb, start_res, end_res, chain_id) tuples.
+        workers (int, optional): Pool size; defaults to os.cpu_count().
+    """
+    normalized = []
+    for job in jobs:
+        i, o, s, e = job[:4]
+        chain = job[4] if len(job) > 4 else None
+        normalized.append((i, o, int(s), int(e), chain))
+    _run_all(trim_pdb_by_residue_range, normalized, workers)
@@ -1,14 +1,169 @@
 import os
 import argparse
+import logging
+
+from _pdb_cols import RES_SEQ, CHAIN_ID, format_ter, parse_res_seq
+
+log = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is not None:
+    from _pdb_soa import line_bounds
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Tags for the kind of the most recently written record, so the TER/END
+# guards never have to re-inspect line prefixes
+KIND_NONE = 0
+KIND_ATOM = 1
+KIND_TER = 2
+KIND_META = 3
+
+# Per-line decisions emitted by the compiled filter
+LINE_DROP = 0
+LINE_KEEP = 1
+LINE_WARN = 2
+
+if njit is not None and np is not None:
+    from numba.types import Tuple, uint8, int64
+
+    # Explicit signature so compilation happens once at import instead
+    # of adding JIT lag to the first call
+    _FILTER_SIG = Tuple((uint8[:], int64, int64, int64))(
+        uint8[:], int64[:], int64[:], int64, int64, int64
+    )
+
+    @njit(_FILTER_SIG, cache=True, boundscheck=False)
+    def _filter_lines(buf, starts, ends, start_res, end_res, chain_ord):
+        """
+        Classify every line of the file buffer for the trim filter.
+
+        Returns a per-line code array (LINE_DROP / LINE_KEEP / LINE_WARN,
+        where LINE_WARN marks an ATOM record with an unparseable resSeq),
+        the kind tag of the last kept record, the kind of the last kept
+        coordinate-level record (ATOM or TER, ignoring metadata) and the
+        index of the last kept ATOM/HETATM line (-1 if none). The logic mirrors
+        _trim_python exactly; byte values are compared numerically since
+        numba works on raw uint8 arrays. chain_ord < 0 disables the
+        chain filter.
+        """
+        n = starts.shape[0]
+        codes = np.zeros(n, dtype=np.uint8)
+        prev_kind = KIND_NONE
+        last_coord_kind = KIND_NONE
+        last_atom_idx = -1
+        for i in range(n):
+            s = starts[i]
+            e = ends[i]
+            length = e - s
+            if length > 0 and buf[e - 1] == 0x0A:
+                length -= 1
+
+            # 'ATOM  ' or 'HETATM'? Truncated coordinate lines take this
+            # branch too, so their clipped resSeq field gets the same
+            # strip-parse treatment as in the Python loops instead of
+            # falling through to the metadata branch and being dropped
+            if length >= 6 and (
+                    (buf[s] == 65 and buf[s + 1] == 84 and buf[s + 2] == 79
+                     and buf[s + 3] == 77 and buf[s + 4] == 32 and buf[s + 5] == 32)
+                    or (buf[s] == 72 and buf[s + 1] == 69 and buf[s + 2] == 84
+                        and buf[s + 3] == 65 and buf[s + 4] == 84 and buf[s + 5] == 77)):
+                # Parse the resSeq field (columns 22:26, clipped to the
+                # line content): optional leading spaces and sign,
+                # digits, optional trailing spaces
+                j = s + 22
+                stop = s + 26
+                if s + length < stop:
+                    stop = s + length
+                if j >= stop:
+                    # Field entirely missing: silent skip, like the
+                    # empty-field case below
+                    continue
+                while j < stop and buf[j] == 32:
+                    j += 1
+                if j == stop:
+                    # Empty field: silent skip, matching the Python path
+                    continue
+                sign = 1
+                if buf[j] == 45:
+                    sign = -1
+                    j += 1
+                elif buf[j] == 43:
+                    j += 1
+                val = 0
+                seen_digit = False
+                while j < stop and 48 <= buf[j] <= 57:
+                    val = val * 10 + (buf[j] - 48)
+                    seen_digit = True
+                    j += 1
+                while j < stop and buf[j] == 32:
+                    j += 1
+                if not seen_digit or j != stop:
+                    # Insertion code or other junk in the field
+                    codes[i] = LINE_WARN
+                    continue
+                val *= sign
+
+                if chain_ord >= 0 and buf[s + 21] != chain_ord:
+                    continue
+                if val < start_res or val > end_res:
+                    codes[i] = LINE_KEEP
+                    prev_kind = KIND_ATOM
+                    last_coord_kind = KIND_ATOM
+                    last_atom_idx = i
+
+            # 'TER'
+            elif length >= 3 and buf[s] == 84 and buf[s + 1] == 69 and buf[s + 2] == 82:
+                if prev_kind == KIND_ATOM:
+                    codes[i] = LINE_KEEP
+                    prev_kind = KIND_TER
+                    last_coord_kind = KIND_TER
+
+            else:
+                # Metadata records: REMARK, MODEL, ENDMDL, CRYST1, MASTER, END
+                keep_meta = False
+                if length >= 3 and buf[s] == 69 and buf[s + 1] == 78 and buf[s + 2] == 68:
+                    keep_meta = True  # END / ENDMDL
+                elif length >= 6:
+                    if (buf[s] == 82 and buf[s + 1] == 69 and buf[s + 2] == 77
+                            and buf[s + 3] == 65 and buf[s + 4] == 82 and buf[s + 5] == 75):
+                        keep_meta = True  # REMARK
+                    elif (buf[s] == 77 and buf[s + 1] == 79 and buf[s + 2] == 68
+                            and buf[s + 3] == 69 and buf[s + 4] == 76 and buf[s + 5] == 32):
+                        keep_meta = True  # MODEL
+                    elif (buf[s] == 67 and buf[s + 1] == 82 and buf[s + 2] == 89
+                            and buf[s + 3] == 83 and buf[s + 4] == 84 and buf[s + 5] == 49):
+                        keep_meta = True  # CRYST1
+                    elif (buf[s] == 77 and buf[s + 1] == 65 and buf[s + 2] == 83
+                            and buf[s + 3] == 84 and buf[s + 4] == 69 and buf[s + 5] == 82):
+                        keep_meta = True  # MASTER
+                if keep_meta:
+                    codes[i] = LINE_KEEP
+                    prev_kind = KIND_META
+
+        return codes, prev_kind, last_coord_kind, last_atom_idx
+else:
+    _filter_lines = None
 
 def trim_pdb_by_residue_range(input_pdb_path, output_pdb_path, start_res_id, end_res_id, chain_id=None):
     """
     Trims (removes) residues within the specified range, keeping the segments
     that are outside this range. Optionally restricts trimming to a specific chain.
-    
-    This function implements the inverse of standard trimming: it removes the middle 
+
+    This function implements the inverse of standard trimming: it removes the middle
     segment (inclusive) and keeps the N-terminal and C-terminal segments.
 
+    When numba and numpy are available the line filter runs as a compiled
+    kernel over the whole file buffer; otherwise a streaming pure-Python
+    loop is used. Both paths produce identical output.
+
     Args:
         input_pdb_path (str): Path to the input AlphaFold PDB file.
         output_pdb_path (str): Path where the trimmed PDB will be saved.
@@ -17,112 +172,295 @@ def trim_pdb_by_residue_range(input_pdb_path, output_pdb_path, start_res_id, end
         chain_id (str, optional): The ID of the chain to trim (e.g., 'A').
                                   If None, all chains are processed.
     """
-    trimmed_lines = []
-    
     # PDB format fixed-width column definitions for ATOM records
     # Columns 23-26 contain the Residue Sequence Number (ResID)
     # Column 22 contains the Chain Identifier
-    
+
+    # Convert the chain filter to bytes once, outside the loop
+    chain_id_b = chain_id.encode('ascii') if chain_id is not None else None
+
     try:
-        with open(input_pdb_path, 'r') as infile:
-            for line in infile:
-                # We only care about ATOM, HETATM, and structural records.
-                record_type = line[0:6].strip()
-                
-                if record_type in ['ATOM', 'HETATM']:
-                    # Extract the residue number and chain ID
-                    res_seq_num_str = line[22:26].strip()
-                    current_chain_id = line[21].strip()
-                    
-                    if not res_seq_num_str:
-                        # Skip lines where ResID is missing/unclear
-                        continue
-                        
-                    try:
-                        res_seq_num = int(res_seq_num_str)
-                    except ValueError:
-                        # Handle cases with insertion codes (e.g., 100A).
-                        print(f"Warning: Skipping residue with insertion code at line: {line.strip()}")
-                        continue
-                    
-                    # 1. Check if the line belongs to the desired chain (if specified)
-                    chain_match = (chain_id is None) or (current_chain_id == chain_id)
-
-                    # 2. Check if the residue is OUTSIDE the trimming range (i.e., we KEEP it)
-                    is_outside_range = not (start_res_id <= res_seq_num <= end_res_id)
-                    
-                    if chain_match and is_outside_range:
-                        trimmed_lines.append(line)
-                        
-                elif record_type == 'TER':
-                    # Add TER records, but only if they follow an ATOM/HETATM line that was kept.
-                    if trimmed_lines and trimmed_lines[-1].startswith(('ATOM', 'HETATM')):
-                        trimmed_lines.append(line)
-                        
-                elif record_type in ['REMARK', 'MODEL', 'ENDMDL', 'CRYST1', 'MASTER', 'END']:
-                    # Keep metadata lines
-                    trimmed_lines.append(line)
-
-
-        # Add the final END record and ensure a clean TER record is present.
-        if not trimmed_lines or not trimmed_lines[-1].strip() == 'END':
-             # Find the last ATOM line in the kept lines
-            last_atom_index = -1
-            for i in range(len(trimmed_lines) - 1, -1, -1):
-                if trimmed_lines[i].startswith(('ATOM', 'HETATM')):
-                    last_atom_index = i
-                    break
-            
-            # If the last kept line is an ATOM, ensure it's followed by a TER record
-            if last_atom_index != -1 and not trimmed_lines[last_atom_index].startswith('TER'):
-                 last_line = trimmed_lines[last_atom_index]
-                 serial = last_line[6:11]
-                 resName = last_line[17:20]
-                 chainID = last_line[21]
-                 resSeq = last_line[22:26]
-                 # Create a TER record based on the last atom's numbering
-                 ter_line = f"TER   {int(serial):>4}      {resName} {chainID}{resSeq}\n"
-                 trimmed_lines.append(ter_line)
-                 
-            # Ensure the file ends with END
-            if not trimmed_lines or not trimmed_lines[-1].strip() == 'END':
-                trimmed_lines.append("END\n")
-
-        with open(output_pdb_path, 'w') as outfile:
-            outfile.writelines(trimmed_lines)
-
-        print(f"Successfully trimmed PDB file and saved to: {output_pdb_path}")
-        print(f"Residues REMOVED in range: {start_res_id} to {end_res_id}")
-        print(f"Remaining residues (outside the range) were kept.")
+        # The jitted filter encodes the chain as a single byte ordinal,
+        # so empty or multi-character filters (which can never match the
+        # one-char chain column) must take the Python loop instead of
+        # silently matching on the first byte
+        use_compiled = _filter_lines is not None and (
+            chain_id_b is None or len(chain_id_b) == 1)
+        if use_compiled:
+            # Compiled path: read the whole file into a uint8 buffer and
+            # classify every line in one jitted pass
+            buf = np.fromfile(input_pdb_path, dtype=np.uint8)
+            with open(output_pdb_path, 'wb', buffering=1 << 20) as outfile:
+                last_written, last_atom_line, last_coord_kind = _trim_numba(
+                    buf, outfile, start_res_id, end_res_id, chain_id_b)
+                _finalize_records(outfile, last_written, last_atom_line, last_coord_kind)
+        else:
+            # Stream kept lines straight to the output file (1MB buffered)
+            # instead of accumulating them in a list first. Files are
+            # opened in binary mode so lines stay bytes end to end.
+            with open(input_pdb_path, 'rb') as infile, \
+                 open(output_pdb_path, 'wb', buffering=1 << 20) as outfile:
+                last_written, last_atom_line, last_coord_kind = _trim_python(
+                    infile, outfile, start_res_id, end_res_id, chain_id_b)
+                _finalize_records(outfile, last_written, last_atom_line, last_coord_kind)
+
+        log.info("Successfully trimmed PDB file and saved to: %s", output_pdb_path)
+        log.info("Residues REMOVED in range: %d to %d", start_res_id, end_res_id)
+        log.info("Remaining residues (outside the range) were kept.")
         if chain_id:
-            print(f"Chain processed: {chain_id}")
+            log.info("Chain processed: %s", chain_id)
 
     except FileNotFoundError:
-        print(f"Error: Input file not found at {input_pdb_path}")
+        log.error("Input file not found at %s", input_pdb_path)
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        log.error("An unexpected error occurred: %s", e)
+
+def _iter_lines(infile, chunk_size=1 << 20):
+    """
+    Yield complete lines from a binary file by reading fixed-size chunks
+    and splitting them with bytes.splitlines, which runs entirely in C.
+    This amortizes the per-line file-object method dispatch of plain
+    line iteration across thousands of lines and naturally cache-blocks
+    the work.
+    """
+    remainder = b''
+    while True:
+        chunk = infile.read(chunk_size)
+        if not chunk:
+            break
+        if remainder:
+            chunk = remainder + chunk
+        nl = chunk.rfind(b'\n')
+        if nl < 0:
+            remainder = chunk
+            continue
+        remainder = chunk[nl + 1:]
+        yield from chunk[:nl + 1].splitlines(keepends=True)
+    if remainder:
+        yield remainder
+
+def _trim_python(infile, outfile, start_res_id, end_res_id, chain_id_b):
+    """
+    Streaming pure-Python trim loop. Writes kept lines to outfile and
+    returns the last written line, the last kept ATOM/HETATM line and
+    the kind of the last kept coordinate-level record (ATOM or TER,
+    ignoring metadata). The last ATOM line is remembered as it is
+    written, so synthesizing a trailing TER never needs a backward scan
+    over the output.
+
+    The chain filter is a run-time constant, so the work is dispatched
+    to an inner loop specialized for "all chains" or "one chain" up
+    front instead of re-testing chain_id_b is None on every line.
+    """
+    if chain_id_b is None:
+        return _trim_all_chains(infile, outfile, start_res_id, end_res_id)
+    return _trim_one_chain(infile, outfile, start_res_id, end_res_id, chain_id_b)
+
+def _parse_res_seq_slow(line):
+    """
+    General fallback for resSeq fields the lookup-table parser rejects:
+    empty fields are skipped silently, signed numbers still parse via
+    int(), and insertion codes warn. Returns the number or None to skip.
+    """
+    field = line[RES_SEQ]
+    if not field.strip():
+        # Skip lines where ResID is missing/unclear
+        return None
+    try:
+        # int() accepts space-padded bytes directly
+        return int(field)
+    except ValueError:
+        # Handle cases with insertion codes (e.g., 100A).
+        log.warning("Skipping residue with insertion code at line: %s",
+                    line.decode('ascii', 'replace').strip())
+        return None
+
+def _trim_all_chains(infile, outfile, start_res_id, end_res_id):
+    """
+    Specialized trim loop used when no chain filter is given.
+    """
+    last_written = None
+    last_atom_line = None
+    prev_kind = KIND_NONE
+    last_coord_kind = KIND_NONE
+    for line in _iter_lines(infile):
+        # We only care about ATOM, HETATM, and structural records.
+        # startswith on prefix tuples avoids the slice + strip +
+        # membership-test allocations of the old record_type check.
+        if line.startswith((b'ATOM  ', b'HETATM')):
+            # Extract the residue number: lookup-table parse for the
+            # common right-justified case, general fallback otherwise
+            res_seq_num = parse_res_seq(line[RES_SEQ])
+            if res_seq_num is None:
+                res_seq_num = _parse_res_seq_slow(line)
+                if res_seq_num is None:
+                    continue
+
+            # Keep the residue if it is OUTSIDE the trimming range
+            if not (start_res_id <= res_seq_num <= end_res_id):
+                outfile.write(line)
+                last_written = line
+                last_atom_line = line
+                prev_kind = KIND_ATOM
+                last_coord_kind = KIND_ATOM
+
+        elif line.startswith(b'TER'):
+            # Add TER records, but only if they follow an ATOM/HETATM line that was kept.
+            if prev_kind == KIND_ATOM:
+                outfile.write(line)
+                last_written = line
+                prev_kind = KIND_TER
+                last_coord_kind = KIND_TER
+
+        elif line.startswith((b'REMARK', b'MODEL ', b'ENDMDL', b'CRYST1', b'MASTER', b'END')):
+            # Keep metadata lines
+            outfile.write(line)
+            last_written = line
+            prev_kind = KIND_META
+
+    return last_written, last_atom_line, last_coord_kind
+
+def _trim_one_chain(infile, outfile, start_res_id, end_res_id, chain_id_b):
+    """
+    Specialized trim loop used when trimming is restricted to one chain.
+    """
+    last_written = None
+    last_atom_line = None
+    prev_kind = KIND_NONE
+    last_coord_kind = KIND_NONE
+    for line in _iter_lines(infile):
+        # We only care about ATOM, HETATM, and structural records.
+        # startswith on prefix tuples avoids the slice + strip +
+        # membership-test allocations of the old record_type check.
+        if line.startswith((b'ATOM  ', b'HETATM')):
+            # Extract the residue number: lookup-table parse for the
+            # common right-justified case, general fallback otherwise
+            res_seq_num = parse_res_seq(line[RES_SEQ])
+            if res_seq_num is None:
+                res_seq_num = _parse_res_seq_slow(line)
+                if res_seq_num is None:
+                    continue
+
+            # Keep the residue if it belongs to the desired chain and is
+            # OUTSIDE the trimming range. The chain column is exactly one
+            # character, so the raw slice compares equal to the encoded
+            # chain ID without a per-line strip() allocation.
+            if line[CHAIN_ID] == chain_id_b and not (start_res_id <= res_seq_num <= end_res_id):
+                outfile.write(line)
+                last_written = line
+                last_atom_line = line
+                prev_kind = KIND_ATOM
+                last_coord_kind = KIND_ATOM
+
+        elif line.startswith(b'TER'):
+            # Add TER records, but only if they follow an ATOM/HETATM line that was kept.
+            if prev_kind == KIND_ATOM:
+                outfile.write(line)
+                last_written = line
+                prev_kind = KIND_TER
+                last_coord_kind = KIND_TER
+
+        elif line.startswith((b'REMARK', b'MODEL ', b'ENDMDL', b'CRYST1', b'MASTER', b'END')):
+            # Keep metadata lines
+            outfile.write(line)
+            last_written = line
+            prev_kind = KIND_META
+
+    return last_written, last_atom_line, last_coord_kind
+
+def _trim_numba(buf, outfile, start_res_id, end_res_id, chain_id_b):
+    """
+    Driver for the jitted filter: computes line bounds, classifies all
+    lines in one compiled pass, then writes kept lines as coalesced
+    contiguous runs. Returns the same (last_written, last_atom_line,
+    last_coord_kind) triple as _trim_python.
+    """
+    size = buf.shape[0]
+    if size == 0:
+        return None, None, KIND_NONE
+
+    starts, ends = line_bounds(buf)
+
+    chain_ord = chain_id_b[0] if chain_id_b else -1
+    codes, prev_kind, last_coord_kind, last_atom_idx = _filter_lines(
+        buf, starts, ends, start_res_id, end_res_id, chain_ord)
+
+    data = buf.tobytes()
+    for i in np.flatnonzero(codes == LINE_WARN):
+        line = data[starts[i]:ends[i]]
+        log.warning("Skipping residue with insertion code at line: %s",
+                    line.decode('ascii', 'replace').strip())
+
+    kept = np.flatnonzero(codes == LINE_KEEP)
+    if len(kept) == 0:
+        return None, None, KIND_NONE
+
+    # Coalesce runs of consecutive kept lines into single writes
+    breaks = np.flatnonzero(kept[1:] != kept[:-1] + 1) + 1
+    run_starts = np.concatenate(([0], breaks))
+    run_ends = np.concatenate((breaks, [len(kept)]))
+    for a, b in zip(run_starts, run_ends):
+        outfile.write(data[starts[kept[a]]:ends[kept[b - 1]]])
+
+    last_written = data[starts[kept[-1]]:ends[kept[-1]]]
+    last_atom_line = None
+    if last_atom_idx >= 0:
+        last_atom_line = data[starts[last_atom_idx]:ends[last_atom_idx]]
+    return last_written, last_atom_line, last_coord_kind
+
+def _finalize_records(outfile, last_written, last_atom_line, last_coord_kind):
+    """
+    Add the final END record and ensure a clean TER record is present.
+
+    The TER is synthesized from the last kept ATOM/HETATM line (tracked
+    during the forward pass) whenever no TER followed it, even if
+    metadata lines were written in between.
+    """
+    if last_written is None or not last_written.strip() == b'END':
+        # If the last coordinate record is an unterminated ATOM, follow
+        # it with a TER record based on that atom's numbering
+        if last_coord_kind == KIND_ATOM:
+            ter_line = format_ter(last_atom_line)
+            outfile.write(ter_line)
+            last_written = ter_line
+
+        # Ensure the file ends with END
+        if last_written is None or not last_written.strip() == b'END':
+            outfile.write(b"END\n")
 
 if __name__ == "__main__":
     # Example usage:
     # python trim_pdb.py -i your_alphafold_target.pdb -o trimmed_target.pdb -s 10 -e 150 -c A
-    
+
+    # Status messages go through logging; keep them visible at the CLI
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     parser = argparse.ArgumentParser(description="Trim residues from an AlphaFold PDB file.")
-    parser.add_argument('-i', '--input_pdb', required=True, help="Path to the input PDB file.")
-    parser.add_argument('-o', '--output_pdb', required=True, help="Path for the output trimmed PDB file.")
-    parser.add_argument('-s', '--start_res', type=int, required=True, help="Starting residue number (inclusive) of the segment to REMOVE.")
-    parser.add_argument('-e', '--end_res', type=int, required=True, help="Ending residue number (inclusive) of the segment to REMOVE.")
+    parser.add_argument('-i', '--input_pdb', help="Path to the input PDB file.")
+    parser.add_argument('-o', '--output_pdb', help="Path for the output trimmed PDB file.")
+    parser.add_argument('-s', '--start_res', type=int, help="Starting residue number (inclusive) of the segment to REMOVE.")
+    parser.add_argument('-e', '--end_res', type=int, help="Ending residue number (inclusive) of the segment to REMOVE.")
     parser.add_argument('-c', '--chain_id', type=str, default=None, help="Optional: Specify the chain ID to trim (e.g., 'A').")
-    
+    parser.add_argument('--jobs', help="TSV file with one 'input_pdb<TAB>output_pdb<TAB>start_res<TAB>end_res[<TAB>chain_id]' job per line, processed in parallel instead of the flags above.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes for --jobs (default: all cores).")
+
     args = parser.parse_args()
 
-    # The Chain ID often needs to be stripped of whitespace if used in PDB lines
-    if args.chain_id:
-        args.chain_id = args.chain_id.strip()
+    if args.jobs:
+        from batch import read_jobs, trim_many
+        trim_many(read_jobs(args.jobs), args.workers)
+    else:
+        if args.input_pdb is None or args.output_pdb is None or args.start_res is None or args.end_res is None:
+            parser.error("-i, -o, -s and -e are required unless --jobs is given")
 
-    trim_pdb_by_residue_range(
-        args.input_pdb,
-        args.output_pdb,
-        args.start_res,
-        args.end_res,
-        args.chain_id
-    )
+        # The Chain ID often needs to be stripped of whitespace if used in PDB lines
+        if args.chain_id:
+            args.chain_id = args.chain_id.strip()
+
+        trim_pdb_by_residue_range(
+            args.input_pdb,
+            args.output_pdb,
+            args.start_res,
+            args.end_res,
+            args.chain_id
+        )